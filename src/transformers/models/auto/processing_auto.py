@@ -17,18 +17,17 @@
 import importlib
 import inspect
 import json
+import os
 import warnings
 from collections import OrderedDict
+from functools import lru_cache
 
 # Build the list of all feature extractors
 from ...configuration_utils import PretrainedConfig
 from ...dynamic_module_utils import get_class_from_dynamic_module, resolve_trust_remote_code
-from ...feature_extraction_utils import FeatureExtractionMixin
-from ...image_processing_utils import ImageProcessingMixin
-from ...processing_utils import ProcessorMixin
 from ...tokenization_utils import TOKENIZER_CONFIG_FILE
 from ...utils import FEATURE_EXTRACTOR_NAME, PROCESSOR_NAME, VIDEO_PROCESSOR_NAME, cached_file, logging
-from ...video_processing_utils import BaseVideoProcessor
+from ...utils.hub import cached_files
 from .auto_factory import _LazyAutoMapping
 from .configuration_auto import (
     CONFIG_MAPPING_NAMES,
@@ -36,13 +35,14 @@ from .configuration_auto import (
     model_type_to_module_name,
     replace_list_option_in_docstrings,
 )
-from .feature_extraction_auto import AutoFeatureExtractor
-from .image_processing_auto import AutoImageProcessor
-from .tokenization_auto import AutoTokenizer
 
 
 logger = logging.get_logger(__name__)
 
+# Keyword arguments accepted by `cached_file` (which forwards them to `cached_files`), used to filter the kwargs of
+# `AutoProcessor.from_pretrained`
+_CACHED_FILE_PARAMS = frozenset(inspect.signature(cached_files).parameters)
+
 PROCESSOR_MAPPING_NAMES = OrderedDict(
     [
         ("aimv2", "CLIPProcessor"),
@@ -147,17 +147,21 @@ PROCESSOR_MAPPING_NAMES = OrderedDict(
 
 PROCESSOR_MAPPING = _LazyAutoMapping(CONFIG_MAPPING_NAMES, PROCESSOR_MAPPING_NAMES)
 
+# Reverse index of `PROCESSOR_MAPPING_NAMES`: a processor class name maps to the modules of all the model types using
+# it (several model types share the same processor, e.g. `Wav2Vec2Processor`).
+_CLASS_TO_MODULES: dict[str, list[str]] = {}
+for model_type, processor in PROCESSOR_MAPPING_NAMES.items():
+    _CLASS_TO_MODULES.setdefault(processor, []).append(model_type_to_module_name(model_type))
 
-def processor_class_from_name(class_name: str):
-    for module_name, processors in PROCESSOR_MAPPING_NAMES.items():
-        if class_name in processors:
-            module_name = model_type_to_module_name(module_name)
 
-            module = importlib.import_module(f".{module_name}", "transformers.models")
-            try:
-                return getattr(module, class_name)
-            except AttributeError:
-                continue
+@lru_cache(maxsize=None)
+def processor_class_from_name(class_name: str):
+    for module_name in _CLASS_TO_MODULES.get(class_name, ()):
+        module = importlib.import_module(f".{module_name}", "transformers.models")
+        try:
+            return getattr(module, class_name)
+        except AttributeError:
+            continue
 
     for processor in PROCESSOR_MAPPING._extra_content.values():
         if getattr(processor, "__name__", None) == class_name:
@@ -274,9 +278,22 @@ class AutoProcessor:
         processor_class = None
         processor_auto_map = None
 
+        # If we were given a config that names a processor class of the library and remote code is not allowed, there is
+        # no need to look for the processor class in the saved files.
+        if (
+            isinstance(config, PretrainedConfig)
+            and getattr(config, "processor_class", None) is not None
+            and trust_remote_code is not True
+            and processor_class_from_name(config.processor_class) is not None
+        ):
+            processor_class = config.processor_class
+            auto_map = getattr(config, "auto_map", None)
+            if auto_map and "AutoProcessor" in auto_map:
+                processor_auto_map = auto_map["AutoProcessor"]
+
         # First, let's see if we have a processor or preprocessor config.
         # Filter the kwargs for `cached_file`.
-        cached_file_kwargs = {key: kwargs[key] for key in inspect.signature(cached_file).parameters if key in kwargs}
+        cached_file_kwargs = {key: value for key, value in kwargs.items() if key in _CACHED_FILE_PARAMS}
         # We don't want to raise
         cached_file_kwargs.update(
             {
@@ -286,63 +303,61 @@ class AutoProcessor:
             }
         )
 
-        # Let's start by checking whether the processor class is saved in a processor config
-        processor_config_file = cached_file(pretrained_model_name_or_path, PROCESSOR_NAME, **cached_file_kwargs)
-        if processor_config_file is not None:
-            config_dict, _ = ProcessorMixin.get_processor_dict(pretrained_model_name_or_path, **kwargs)
-            processor_class = config_dict.get("processor_class", None)
-            if "AutoProcessor" in config_dict.get("auto_map", {}):
-                processor_auto_map = config_dict["auto_map"]["AutoProcessor"]
+        # Preprocessor config (shared by image processors and feature extractors), and whether we looked for it
+        preprocessor_config_probed = False
+        preprocessor_config_file = None
 
         if processor_class is None:
-            # If not found, let's check whether the processor class is saved in an image processor config
-            preprocessor_config_file = cached_file(
-                pretrained_model_name_or_path, FEATURE_EXTRACTOR_NAME, **cached_file_kwargs
+            # For a local directory, list its files once so we only resolve the configs that are actually there
+            local_dir = os.path.join(pretrained_model_name_or_path, kwargs.get("subfolder") or "")
+            local_files = set(os.listdir(local_dir)) if os.path.isdir(local_dir) else None
+
+            # Let's start by checking whether the processor class is saved in a processor config, then in an image
+            # processor config (feature extractors are saved in the same file) and, if there is none, in a video processor
+            # config.
+            from ...image_processing_utils import ImageProcessingMixin
+            from ...processing_utils import ProcessorMixin
+            from ...video_processing_utils import BaseVideoProcessor
+
+            config_probes = (
+                (PROCESSOR_NAME, ProcessorMixin.get_processor_dict),
+                (FEATURE_EXTRACTOR_NAME, ImageProcessingMixin.get_image_processor_dict),
+                (VIDEO_PROCESSOR_NAME, BaseVideoProcessor.get_video_processor_dict),
             )
-            if preprocessor_config_file is not None:
-                config_dict, _ = ImageProcessingMixin.get_image_processor_dict(pretrained_model_name_or_path, **kwargs)
+            for config_name, get_config_dict in config_probes:
+                config_file = None
+                if local_files is None or config_name in local_files:
+                    config_file = cached_file(pretrained_model_name_or_path, config_name, **cached_file_kwargs)
+                if config_name == FEATURE_EXTRACTOR_NAME:
+                    preprocessor_config_probed = True
+                    preprocessor_config_file = config_file
+                if config_file is None:
+                    continue
+
+                config_dict, _ = get_config_dict(pretrained_model_name_or_path, **kwargs)
                 processor_class = config_dict.get("processor_class", None)
-                if "AutoProcessor" in config_dict.get("auto_map", {}):
-                    processor_auto_map = config_dict["auto_map"]["AutoProcessor"]
-
-            # Saved as video processor
-            if preprocessor_config_file is None:
-                preprocessor_config_file = cached_file(
-                    pretrained_model_name_or_path, VIDEO_PROCESSOR_NAME, **cached_file_kwargs
-                )
-                if preprocessor_config_file is not None:
-                    config_dict, _ = BaseVideoProcessor.get_video_processor_dict(
-                        pretrained_model_name_or_path, **kwargs
-                    )
-                    processor_class = config_dict.get("processor_class", None)
-                    if "AutoProcessor" in config_dict.get("auto_map", {}):
-                        processor_auto_map = config_dict["auto_map"]["AutoProcessor"]
-
-            # Saved as feature extractor
-            if preprocessor_config_file is None:
-                preprocessor_config_file = cached_file(
-                    pretrained_model_name_or_path, FEATURE_EXTRACTOR_NAME, **cached_file_kwargs
-                )
-                if preprocessor_config_file is not None and processor_class is None:
-                    config_dict, _ = FeatureExtractionMixin.get_feature_extractor_dict(
-                        pretrained_model_name_or_path, **kwargs
-                    )
-                    processor_class = config_dict.get("processor_class", None)
-                    if "AutoProcessor" in config_dict.get("auto_map", {}):
-                        processor_auto_map = config_dict["auto_map"]["AutoProcessor"]
+                auto_map = config_dict.get("auto_map")
+                if auto_map and "AutoProcessor" in auto_map:
+                    processor_auto_map = auto_map["AutoProcessor"]
+                if processor_class is not None or config_name == FEATURE_EXTRACTOR_NAME:
+                    break
 
         if processor_class is None:
             # Next, let's check whether the processor class is saved in a tokenizer
-            tokenizer_config_file = cached_file(
-                pretrained_model_name_or_path, TOKENIZER_CONFIG_FILE, **cached_file_kwargs
-            )
+            tokenizer_config_file = None
+            if local_files is None or TOKENIZER_CONFIG_FILE in local_files:
+                tokenizer_config_file = cached_file(
+                    pretrained_model_name_or_path, TOKENIZER_CONFIG_FILE, **cached_file_kwargs
+                )
             if tokenizer_config_file is not None:
-                with open(tokenizer_config_file, encoding="utf-8") as reader:
-                    config_dict = json.load(reader)
+                # `json.loads` decodes the raw UTF-8 bytes itself, no need to go through a text stream
+                with open(tokenizer_config_file, "rb") as reader:
+                    config_dict = json.loads(reader.read())
 
                 processor_class = config_dict.get("processor_class", None)
-                if "AutoProcessor" in config_dict.get("auto_map", {}):
-                    processor_auto_map = config_dict["auto_map"]["AutoProcessor"]
+                auto_map = config_dict.get("auto_map")
+                if auto_map and "AutoProcessor" in auto_map:
+                    processor_auto_map = auto_map["AutoProcessor"]
 
         if processor_class is None:
             # Otherwise, load config, if it can be loaded.
@@ -353,14 +368,16 @@ class AutoProcessor:
 
             # And check if the config contains the processor class.
             processor_class = getattr(config, "processor_class", None)
-            if hasattr(config, "auto_map") and "AutoProcessor" in config.auto_map:
-                processor_auto_map = config.auto_map["AutoProcessor"]
+            auto_map = getattr(config, "auto_map", None)
+            if auto_map and "AutoProcessor" in auto_map:
+                processor_auto_map = auto_map["AutoProcessor"]
 
         if processor_class is not None:
             processor_class = processor_class_from_name(processor_class)
 
         has_remote_code = processor_auto_map is not None
-        has_local_code = processor_class is not None or type(config) in PROCESSOR_MAPPING
+        config_in_processor_mapping = type(config) in PROCESSOR_MAPPING
+        has_local_code = processor_class is not None or config_in_processor_mapping
         if has_remote_code:
             if "--" in processor_auto_map:
                 upstream_repo = processor_auto_map.split("--")[0]
@@ -384,25 +401,23 @@ class AutoProcessor:
                 pretrained_model_name_or_path, trust_remote_code=trust_remote_code, **kwargs
             )
         # Last try: we use the PROCESSOR_MAPPING.
-        elif type(config) in PROCESSOR_MAPPING:
+        elif config_in_processor_mapping:
             return PROCESSOR_MAPPING[type(config)].from_pretrained(pretrained_model_name_or_path, **kwargs)
 
         # At this stage, there doesn't seem to be a `Processor` class available for this model, so let's try a
-        # tokenizer.
-        try:
-            return AutoTokenizer.from_pretrained(
-                pretrained_model_name_or_path, trust_remote_code=trust_remote_code, **kwargs
-            )
-        except Exception:
-            try:
-                return AutoImageProcessor.from_pretrained(
-                    pretrained_model_name_or_path, trust_remote_code=trust_remote_code, **kwargs
-                )
-            except Exception:
-                pass
+        # tokenizer, an image processor or a feature extractor. Image processors and feature extractors both need a
+        # preprocessor config, so skip them if we looked for one above and could not find it.
+        from .feature_extraction_auto import AutoFeatureExtractor
+        from .image_processing_auto import AutoImageProcessor
+        from .tokenization_auto import AutoTokenizer
+
+        auto_classes = [AutoTokenizer]
+        if preprocessor_config_file is not None or not preprocessor_config_probed:
+            auto_classes += [AutoImageProcessor, AutoFeatureExtractor]
 
+        for auto_class in auto_classes:
             try:
-                return AutoFeatureExtractor.from_pretrained(
+                return auto_class.from_pretrained(
                     pretrained_model_name_or_path, trust_remote_code=trust_remote_code, **kwargs
                 )
             except Exception:
@@ -425,6 +440,8 @@ class AutoProcessor:
             processor_class ([`ProcessorMixin`]): The processor to register.
         """
         PROCESSOR_MAPPING.register(config_class, processor_class, exist_ok=exist_ok)
+        # The registered processor can now be resolved by name
+        processor_class_from_name.cache_clear()
 
 
 __all__ = ["PROCESSOR_MAPPING", "AutoProcessor"]
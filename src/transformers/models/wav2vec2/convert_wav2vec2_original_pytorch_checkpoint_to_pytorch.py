@@ -17,6 +17,8 @@
 import argparse
 import json
 import os
+import re
+from operator import attrgetter
 
 import fairseq
 import torch
@@ -69,30 +71,26 @@ TOP_LEVEL_KEYS = [
     "projector",
     "classifier",
 ]
+# `MAPPING` entries as (key, key without its `w2v_model.` prefix, full name of the mapped key in the HF model), in the
+# same order since the first match wins
+FULL_MAPPING = [
+    (key, key.split("w2v_model.")[-1], mapped_key if mapped_key in TOP_LEVEL_KEYS else "wav2vec2." + mapped_key)
+    for key, mapped_key in MAPPING.items()
+]
 
 
 def read_txt_into_dict(filename):
-    result = {}
     with open(filename, "r") as file:
-        for line_number, line in enumerate(file):
-            line = line.strip()
-            if line:
-                words = line.split()
-                key = line_number
-                value = words[0]
-                result[key] = value
-    return result
+        lines = file.read().split("\n")
+    return {line_number: line.split(None, 1)[0] for line_number, line in enumerate(lines) if line.strip()}
 
 
 def set_recursively(key, value, full_name, weight_type, hf_pointer):
-    for attribute in key.split("."):
-        hf_pointer = getattr(hf_pointer, attribute)
+    hf_pointer = attrgetter(key)(hf_pointer)
 
-    hf_param_name = None
-    for param_key in PARAM_MAPPING:
-        if full_name.endswith(param_key):
-            hf_param_name = PARAM_MAPPING[full_name.split(".")[-1]]
-            weight_type = "param"
+    hf_param_name = PARAM_MAPPING.get(full_name.rpartition(".")[2])
+    if hf_param_name is not None:
+        weight_type = "param"
 
     # fairseq uses nn.utils.weight_norm() while transformers switches to nn.utils.parametrizations.weight_norm()
     # the mapping between two versions:
@@ -106,9 +104,7 @@ def set_recursively(key, value, full_name, weight_type, hf_pointer):
         else:
             hf_shape = getattr(hf_pointer, weight_type).shape
     elif weight_type is not None and weight_type == "param":
-        shape_pointer = hf_pointer
-        for attribute in hf_param_name.split("."):
-            shape_pointer = getattr(shape_pointer, attribute)
+        shape_pointer = attrgetter(hf_param_name)(hf_pointer)
         hf_shape = shape_pointer.shape
 
         # let's reduce dimension
@@ -137,9 +133,7 @@ def set_recursively(key, value, full_name, weight_type, hf_pointer):
     elif weight_type == "bias":
         hf_pointer.bias.data = value
     elif weight_type == "param":
-        for attribute in hf_param_name.split("."):
-            hf_pointer = getattr(hf_pointer, attribute)
-        hf_pointer.data = value
+        shape_pointer.data = value
     else:
         hf_pointer.data = value
 
@@ -147,11 +141,9 @@ def set_recursively(key, value, full_name, weight_type, hf_pointer):
 
 
 def rename_dict(key, value, full_name, weight_type, hf_dict):
-    hf_param_name = None
-    for param_key in PARAM_MAPPING:
-        if full_name.endswith(param_key):
-            hf_param_name = PARAM_MAPPING[full_name.split(".")[-1]]
-            weight_type = "param"
+    hf_param_name = PARAM_MAPPING.get(full_name.rpartition(".")[2])
+    if hf_param_name is not None:
+        weight_type = "param"
 
     if weight_type is not None and weight_type != "param":
         full_key = ".".join([key, weight_type])
@@ -172,26 +164,23 @@ PARAM_MAPPING = {
     "ln_b": "norm.bias",
 }
 
+WEIGHT_TYPES = {"weight", "weight_g", "weight_v", "bias"}
+
+# index of the encoder layer in fairseq names such as `encoder.layers.3.fc1.weight`
+LAYER_INDEX_PATTERN = re.compile(r"\.(\d+)\.")
+
 
 def load_wav2vec2_layer(name, value, hf_model=None, hf_dict=None):
     is_used = False
-    for key, mapped_key in MAPPING.items():
-        mapped_key = "wav2vec2." + mapped_key if mapped_key not in TOP_LEVEL_KEYS else mapped_key
-        if key in name or key.split("w2v_model.")[-1] == name.split(".")[0]:
+    head = name.split(".", 1)[0]
+    for key, stripped_key, mapped_key in FULL_MAPPING:
+        if key in name or stripped_key == head:
             is_used = True
             if "*" in mapped_key:
-                layer_index = name.split(key)[0].split(".")[-2]
+                layer_index = LAYER_INDEX_PATTERN.search(name).group(1)
                 mapped_key = mapped_key.replace("*", layer_index)
-            if "weight_g" in name:
-                weight_type = "weight_g"
-            elif "weight_v" in name:
-                weight_type = "weight_v"
-            elif "bias" in name:
-                weight_type = "bias"
-            elif "weight" in name:
-                # TODO: don't match quantizer.weight_proj
-                weight_type = "weight"
-            else:
+            weight_type = name.rpartition(".")[2]
+            if weight_type not in WEIGHT_TYPES:
                 weight_type = None
             if hf_dict is not None:
                 rename_dict(mapped_key, value, name, weight_type, hf_dict)
@@ -206,17 +195,12 @@ def recursively_load_weights(fairseq_model, hf_model, is_headless):
     fairseq_dict = fairseq_model.state_dict()
 
     feature_extractor = hf_model.wav2vec2.feature_extractor
+    use_group_norm = hf_model.config.feat_extract_norm == "group"
 
     for name, value in fairseq_dict.items():
         is_used = False
         if "conv_layers" in name:
-            load_conv_layer(
-                name,
-                value,
-                feature_extractor,
-                unused_weights,
-                hf_model.config.feat_extract_norm == "group",
-            )
+            load_conv_layer(name, value, feature_extractor, unused_weights, use_group_norm)
             is_used = True
         else:
             is_used = load_wav2vec2_layer(name, value, hf_model)
@@ -233,41 +217,27 @@ def load_conv_layer(full_name, value, feature_extractor, unused_weights, use_gro
     type_id = int(items[1])
 
     if type_id == 0:
-        if "bias" in name:
-            if value.shape != feature_extractor.conv_layers[layer_id].conv.bias.data.shape:
-                raise ValueError(
-                    f"{full_name} has size {value.shape}, but"
-                    f" {feature_extractor.conv_layers[layer_id].conv.bias.data.shape} was found."
-                )
-            feature_extractor.conv_layers[layer_id].conv.bias.data = value
-            logger.info(f"Feat extract conv layer {layer_id} was initialized from {full_name}.")
-        elif "weight" in name:
-            if value.shape != feature_extractor.conv_layers[layer_id].conv.weight.data.shape:
-                raise ValueError(
-                    f"{full_name} has size {value.shape}, but"
-                    f" {feature_extractor.conv_layers[layer_id].conv.weight.data.shape} was found."
-                )
-            feature_extractor.conv_layers[layer_id].conv.weight.data = value
-            logger.info(f"Feat extract conv layer {layer_id} was initialized from {full_name}.")
+        module_name = "conv"
+        description = f"Feat extract conv layer {layer_id}"
     elif (type_id == 2 and not use_group_norm) or (type_id == 2 and layer_id == 0 and use_group_norm):
-        if "bias" in name:
-            if value.shape != feature_extractor.conv_layers[layer_id].layer_norm.bias.data.shape:
-                raise ValueError(
-                    f"{full_name} has size {value.shape}, but"
-                    f" {feature_extractor.conv_layers[layer_id].layer_norm.bias.data.shape} was found."
-                )
-            feature_extractor.conv_layers[layer_id].layer_norm.bias.data = value
-            logger.info(f"Feat extract layer norm weight of layer {layer_id} was initialized from {full_name}.")
-        elif "weight" in name:
-            if value.shape != feature_extractor.conv_layers[layer_id].layer_norm.weight.data.shape:
-                raise ValueError(
-                    f"{full_name} has size {value.shape}, but"
-                    f" {feature_extractor.conv_layers[layer_id].layer_norm.weight.data.shape} was found."
-                )
-            feature_extractor.conv_layers[layer_id].layer_norm.weight.data = value
-            logger.info(f"Feat extract layer norm weight of layer {layer_id} was initialized from {full_name}.")
+        module_name = "layer_norm"
+        description = f"Feat extract layer norm weight of layer {layer_id}"
     else:
         unused_weights.append(full_name)
+        return
+
+    if "bias" in name:
+        param_name = "bias"
+    elif "weight" in name:
+        param_name = "weight"
+    else:
+        return
+
+    param = getattr(getattr(feature_extractor.conv_layers[layer_id], module_name), param_name)
+    if value.shape != param.data.shape:
+        raise ValueError(f"{full_name} has size {value.shape}, but {param.data.shape} was found.")
+    param.data = value
+    logger.info(f"{description} was initialized from {full_name}.")
 
 
 @torch.no_grad()
@@ -309,7 +279,6 @@ def convert_wav2vec2_checkpoint(
             if not os.path.isdir(pytorch_dump_folder_path):
                 logger.error(f"--pytorch_dump_folder_path ({pytorch_dump_folder_path}) should be a directory")
                 return
-            os.makedirs(pytorch_dump_folder_path, exist_ok=True)
             vocab_dict = target_dict.indices
 
             # fairseq has the <pad> and <s> switched
@@ -343,7 +312,7 @@ def convert_wav2vec2_checkpoint(
 
     if is_finetuned or is_seq_class:
         model, _, _ = fairseq.checkpoint_utils.load_model_ensemble_and_task(
-            [checkpoint_path], arg_overrides={"data": "/".join(dict_path.split("/")[:-1])}
+            [checkpoint_path], arg_overrides={"data": os.path.dirname(dict_path)}
         )
     else:
         task_arg = argparse.Namespace(task="audio_pretraining")
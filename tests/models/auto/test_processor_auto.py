@@ -17,6 +17,7 @@ import os
 import sys
 import tempfile
 import unittest
+import unittest.mock as mock
 from pathlib import Path
 from shutil import copyfile
 
@@ -31,19 +32,24 @@ from transformers import (
     TOKENIZER_MAPPING,
     AutoConfig,
     AutoFeatureExtractor,
+    AutoImageProcessor,
     AutoProcessor,
     AutoTokenizer,
+    BertConfig,
     BertTokenizer,
     ProcessorMixin,
     Wav2Vec2Config,
+    Wav2Vec2CTCTokenizer,
     Wav2Vec2FeatureExtractor,
     Wav2Vec2Processor,
 )
+from transformers.models.auto.processing_auto import processor_class_from_name
 from transformers.testing_utils import TOKEN, TemporaryHubRepo, get_tests_dir, is_staging_test
 from transformers.tokenization_utils import TOKENIZER_CONFIG_FILE
 from transformers.utils import (
     FEATURE_EXTRACTOR_NAME,
     PROCESSOR_NAME,
+    cached_file,
     is_tokenizers_available,
 )
 
@@ -198,6 +204,60 @@ class AutoFeatureExtractorTest(unittest.TestCase):
 
         self.assertIsInstance(processor, Wav2Vec2Processor)
 
+    def test_processor_from_local_subfolder(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            feature_extractor = Wav2Vec2FeatureExtractor()
+            tokenizer = Wav2Vec2CTCTokenizer(SAMPLE_VOCAB)
+            processor = Wav2Vec2Processor(feature_extractor, tokenizer)
+
+            # save in a subfolder, the files are looked up there and not at the root of the directory
+            processor.save_pretrained(os.path.join(tmpdirname, "processor"))
+
+            processor = AutoProcessor.from_pretrained(tmpdirname, subfolder="processor")
+
+        self.assertIsInstance(processor, Wav2Vec2Processor)
+
+    def _save_processor_with_remote_code(self, tmpdirname):
+        feature_extractor = Wav2Vec2FeatureExtractor()
+        tokenizer = Wav2Vec2CTCTokenizer(SAMPLE_VOCAB)
+        processor = Wav2Vec2Processor(feature_extractor, tokenizer)
+        processor.save_pretrained(tmpdirname)
+
+        # point the saved files to remote code
+        copyfile(
+            Path(__file__).parent.parent.parent.parent / "utils" / "test_module" / "custom_processing.py",
+            os.path.join(tmpdirname, "custom_processing.py"),
+        )
+        with open(os.path.join(tmpdirname, FEATURE_EXTRACTOR_NAME)) as f:
+            config_dict = json.load(f)
+        config_dict["auto_map"] = {"AutoProcessor": "custom_processing.CustomProcessor"}
+        with open(os.path.join(tmpdirname, FEATURE_EXTRACTOR_NAME), "w") as f:
+            json.dump(config_dict, f)
+
+    def test_processor_from_passed_config_processor_class(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            self._save_processor_with_remote_code(tmpdirname)
+
+            # the processor class of the passed config is used, the saved files are not looked up
+            config = Wav2Vec2Config(processor_class="Wav2Vec2Processor")
+            with mock.patch(
+                "transformers.models.auto.processing_auto.cached_file", wraps=cached_file
+            ) as cached_file_mock:
+                processor = AutoProcessor.from_pretrained(tmpdirname, config=config)
+
+        cached_file_mock.assert_not_called()
+        self.assertIsInstance(processor, Wav2Vec2Processor)
+
+    def test_processor_from_passed_config_processor_class_with_remote_code(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            self._save_processor_with_remote_code(tmpdirname)
+
+            # with remote code allowed, the saved files are still looked up and their `auto_map` is used
+            config = Wav2Vec2Config(processor_class="Wav2Vec2Processor")
+            processor = AutoProcessor.from_pretrained(tmpdirname, trust_remote_code=True, config=config)
+
+        self.assertEqual(processor.__class__.__name__, "CustomProcessor")
+
     def test_from_pretrained_dynamic_processor(self):
         # If remote code is not set, we will time out when asking whether to load the model.
         with self.assertRaises(ValueError):
@@ -408,6 +468,42 @@ class AutoFeatureExtractorTest(unittest.TestCase):
         processor = AutoProcessor.from_pretrained("hf-internal-testing/tiny-random-convnext")
         self.assertEqual(processor.__class__.__name__, "ConvNextImageProcessor")
 
+    def test_auto_processor_falls_back_to_tokenizer_first(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            BertConfig().save_pretrained(tmpdirname)
+            with open(os.path.join(tmpdirname, "vocab.txt"), "w", encoding="utf-8") as vocab_writer:
+                vocab_writer.write("".join([x + "\n" for x in self.vocab_tokens]))
+            # a feature extractor could be loaded too, but the tokenizer comes first even without a tokenizer config
+            with open(os.path.join(tmpdirname, FEATURE_EXTRACTOR_NAME), "w") as f:
+                json.dump({"feature_extractor_type": "Wav2Vec2FeatureExtractor"}, f)
+
+            processor = AutoProcessor.from_pretrained(tmpdirname)
+
+        self.assertTrue(processor.__class__.__name__.startswith("BertTokenizer"))
+
+    def test_auto_processor_skips_classes_without_preprocessor_config(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            BertConfig().save_pretrained(tmpdirname)
+
+            with mock.patch.object(AutoImageProcessor, "from_pretrained") as image_processor_mock:
+                with mock.patch.object(AutoFeatureExtractor, "from_pretrained") as feature_extractor_mock:
+                    # no tokenizer files either, so nothing can be loaded
+                    with self.assertRaises(ValueError):
+                        AutoProcessor.from_pretrained(tmpdirname)
+
+        image_processor_mock.assert_not_called()
+        feature_extractor_mock.assert_not_called()
+
+    def test_auto_processor_reads_auto_map_from_model_config(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            BertConfig(auto_map={"AutoProcessor": "custom_processing.CustomProcessor"}).save_pretrained(tmpdirname)
+            with open(os.path.join(tmpdirname, "vocab.txt"), "w", encoding="utf-8") as vocab_writer:
+                vocab_writer.write("".join([x + "\n" for x in self.vocab_tokens]))
+
+            # the remote processor declared in config.json is picked up instead of falling back to the tokenizer
+            with self.assertRaisesRegex(ValueError, "custom code"):
+                AutoProcessor.from_pretrained(tmpdirname)
+
     def test_auto_processor_save_load(self):
         processor = AutoProcessor.from_pretrained("llava-hf/llava-onevision-qwen2-0.5b-ov-hf")
         with tempfile.TemporaryDirectory() as tmp_dir:
@@ -415,6 +511,11 @@ class AutoFeatureExtractorTest(unittest.TestCase):
             second_processor = AutoProcessor.from_pretrained(tmp_dir)
             self.assertEqual(second_processor.__class__.__name__, processor.__class__.__name__)
 
+    def test_processor_class_from_name(self):
+        self.assertIs(processor_class_from_name("Wav2Vec2Processor"), Wav2Vec2Processor)
+        # Only full class names are matched, not substrings of the processor class names
+        self.assertIsNone(processor_class_from_name("Processor"))
+
 
 @is_staging_test
 class ProcessorPushToHubTester(unittest.TestCase):